@@ -0,0 +1,141 @@
+import datetime
+import io
+
+import pytest
+import yaml
+
+import transcribe_excel_2_yaml
+import transcribe_excel_2_yaml_filt
+
+
+@pytest.fixture(params=[transcribe_excel_2_yaml, transcribe_excel_2_yaml_filt],
+                ids=['posicional', 'filt'])
+def modulo(request):
+    return request.param
+
+
+def _alarme(name, text1=True, subconfig1='s'):
+    return {
+        'alarm_id': 1,
+        'name': name,
+        'text': {'text': 't', 'text1': text1, 'text2': 'x'},
+        'config': {'config': 'c', 'subconfig1': subconfig1, 'subconfig2': None},
+    }
+
+
+@pytest.mark.parametrize('alarme', [
+    _alarme('a "q" \\ b\n\tc: #'),
+    _alarme('bad\x80name\x9f\x85\x7f\x00\x1b'),
+    _alarme('\u2028\u2029\ufeff\ufffe\uffff'),
+    _alarme('true', text1='null'),
+    _alarme('é ü 😀'),
+    _alarme('f', text1=1e20, subconfig1=-2.5e-7),
+    _alarme('f', text1=float('inf'), subconfig1=1.5),
+    _alarme('d', text1=datetime.date(2024, 1, 2)),
+])
+def test_emitir_alarme_ida_e_volta(modulo, alarme):
+    saida = io.StringIO()
+    modulo.AtualizadorDeAlarmes._emitir_alarme(alarme, saida)
+    assert yaml.load(saida.getvalue(), Loader=yaml.SafeLoader) == [alarme]
+
+
+def _executar(modulo, tmp_path, monkeypatch, ids_novos, conteudo_yaml=None, **opcoes):
+    caminho = tmp_path / 'alarmes.yaml'
+    if conteudo_yaml is not None:
+        caminho.write_text(conteudo_yaml, encoding='utf-8')
+    n = len(ids_novos)
+    colunas = modulo.ColunasDeAlarmes(list(ids_novos), ['n'] * n, ['t'] * n, [True] * n,
+                                      ['x'] * n, ['c'] * n, ['s'] * n, ['s'] * n)
+    atualizador = modulo.AtualizadorDeAlarmes(str(caminho), 'nao_usado.xlsx', **opcoes)
+    monkeypatch.setattr(atualizador, '_carregar_alarmes_excel', lambda: colunas)
+    atualizador.executar_atualizacao()
+    return yaml.load(caminho.read_text(encoding='utf-8'), Loader=yaml.SafeLoader)
+
+
+def test_ids_esparsos_nao_alocam_mapa_de_bits(modulo, tmp_path, monkeypatch):
+    existente = '- alarm_id: 1\n  name: a\n'
+    alarmes = _executar(modulo, tmp_path, monkeypatch, [10 ** 13, 1, 10 ** 13], existente)
+    assert sorted(alarme['alarm_id'] for alarme in alarmes) == [1, 2, 10 ** 13, 10 ** 13 + 1]
+
+
+def test_celulas_do_calamine_seguem_o_openpyxl(modulo):
+    normalizar = modulo.AtualizadorDeAlarmes._normalizar_celula_calamine
+    assert normalizar(datetime.date(2024, 1, 2)) == datetime.datetime(2024, 1, 2)
+    assert normalizar(datetime.datetime(2024, 1, 2, 3, 4)) == datetime.datetime(2024, 1, 2, 3, 4)
+    assert normalizar(12.0) == 12 and isinstance(normalizar(12.0), int)
+    assert normalizar(1.5) == 1.5
+
+
+def test_excel_inexistente_nao_altera_o_yaml(modulo, tmp_path):
+    caminho = tmp_path / 'alarmes.yaml'
+    modulo.AtualizadorDeAlarmes(str(caminho), str(tmp_path / 'nao_existe.xlsx')).executar_atualizacao()
+    assert not caminho.exists()
+
+
+@pytest.mark.parametrize('conteudo_yaml', [
+    '- alarm_id: 1\n  name: a\n',
+    '- alarm_id: 1\n  name: a',
+    '[{"alarm_id": 1, "name": "a"}]\n',
+    '  - alarm_id: 1\n    name: a\n',
+    '- alarm_id: 1\n  name: a\n...\n',
+], ids=['bloco', 'sem-quebra-final', 'json', 'indentada', 'fim-explicito'])
+def test_anexar_preserva_alarmes_existentes(modulo, tmp_path, monkeypatch, conteudo_yaml):
+    alarmes = _executar(modulo, tmp_path, monkeypatch, [1, 5], conteudo_yaml, modo_anexar=True)
+    assert alarmes[0] == {'alarm_id': 1, 'name': 'a'}
+    assert sorted(alarme['alarm_id'] for alarme in alarmes) == [1, 2, 5]
+
+
+
+@pytest.mark.parametrize('conteudo_yaml', ['- name: keepme\n', '- alarm_id: 1\n- name: keepme\n'],
+                         ids=['sem-ids', 'ids-parciais'])
+def test_anexar_preserva_itens_sem_alarm_id(modulo, tmp_path, monkeypatch, conteudo_yaml):
+    existentes = yaml.load(conteudo_yaml, Loader=yaml.SafeLoader)
+    alarmes = _executar(modulo, tmp_path, monkeypatch, [1], conteudo_yaml, modo_anexar=True)
+    assert alarmes[:len(existentes)] == existentes
+    assert len(alarmes) == len(existentes) + 1
+
+
+@pytest.mark.parametrize('conteudo_yaml', [None, '', '# vazio\n', '[]\n', 'a: 1\n', '- a: [\n'],
+                         ids=['inexistente', 'vazio', 'comentario', 'lista-vazia', 'mapa', 'invalido'])
+def test_anexar_sem_itens_grava_o_arquivo_completo(modulo, tmp_path, monkeypatch, conteudo_yaml):
+    alarmes = _executar(modulo, tmp_path, monkeypatch, [3, 1], conteudo_yaml, modo_anexar=True)
+    assert sorted(alarme['alarm_id'] for alarme in alarmes) == [1, 3]
+
+@pytest.mark.parametrize('alarm_id', ['0x2', '&id 2', '017'])
+def test_anexar_com_ids_nao_decimais_recarrega_o_arquivo(modulo, tmp_path, monkeypatch, alarm_id):
+    conteudo_yaml = f'- alarm_id: {alarm_id}\n  name: a\n'
+    esperado = yaml.load(conteudo_yaml, Loader=yaml.SafeLoader)[0]
+    alarmes = _executar(modulo, tmp_path, monkeypatch, [5], conteudo_yaml, modo_anexar=True)
+    assert esperado in alarmes
+    assert 5 in [alarme['alarm_id'] for alarme in alarmes]
+
+
+@pytest.mark.parametrize('alarm_id', ['0x2', '"2"', '"abc"', '*id', '017'])
+def test_ids_nao_decimais_nao_sao_lidos_pelo_parser_de_eventos(modulo, tmp_path, alarm_id):
+    caminho = tmp_path / 'alarmes.yaml'
+    caminho.write_text(f'- alarm_id: &id 1\n- alarm_id: {alarm_id}\n', encoding='utf-8')
+    assert modulo.AtualizadorDeAlarmes(str(caminho), 'nao_usado.xlsx')._carregar_ids_yaml() is None
+
+
+
+@pytest.mark.parametrize('modo_anexar', [False, True], ids=['completo', 'anexar'])
+def test_ids_que_nao_sao_inteiros_sao_preservados(modulo, tmp_path, monkeypatch, modo_anexar):
+    conteudo_yaml = '- alarm_id: abc\n  name: a\n- name: sem-id\n- alarm_id: 4\n  name: b\n'
+    alarmes = _executar(modulo, tmp_path, monkeypatch, [4, 1], conteudo_yaml, modo_anexar=modo_anexar)
+    assert {'alarm_id': 'abc', 'name': 'a'} in alarmes
+    assert {'name': 'sem-id'} in alarmes
+    ids = [alarme.get('alarm_id') for alarme in alarmes]
+    assert sorted(i for i in ids if isinstance(i, int)) == [1, 4, 5]
+    if modulo.__name__ == 'transcribe_excel_2_yaml':
+        assert ids == [1, 4, 5, None, 'abc']
+
+@pytest.mark.parametrize('com_orjson', [True, False], ids=['orjson', 'json'])
+def test_serializar_json_aceita_valores_do_yaml(modulo, monkeypatch, com_orjson):
+    if com_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(modulo, 'orjson', None)
+    data = [{'alarm_id': 1, 'name': datetime.date(2024, 1, 2), 'extra': {'quando': datetime.datetime(2024, 1, 2, 3, 4)}}]
+    saida = modulo.AtualizadorDeAlarmes._serializar_json(data)
+    assert yaml.load(saida, Loader=yaml.SafeLoader) == [
+        {'alarm_id': 1, 'name': '2024-01-02', 'extra': {'quando': '2024-01-02T03:04:00'}}]
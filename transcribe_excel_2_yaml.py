@@ -1,7 +1,94 @@
 import yaml
-import pandas as pd
+try:
+    # Usa a implementação em C (libyaml) quando disponível
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+import openpyxl
+import numpy as np
+try:
+    # Leitor em Rust, bem mais rápido que o openpyxl para arquivos .xlsx
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+try:
+    # Serializador JSON em Rust, usado quando a saída pode ser JSON
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    # Compilador JIT opcional para o laço de resolução de conflitos de ID
+    from numba import njit
+except ImportError:
+    njit = None
 import os
-from typing import List, Dict, Any
+import datetime
+import logging
+import argparse
+import io
+import json
+import math
+import re
+from collections import namedtuple
+from operator import itemgetter
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Alarmes lidos do Excel, guardados coluna a coluna (uma lista por campo) até a gravação
+ColunasDeAlarmes = namedtuple('ColunasDeAlarmes', 'alarm_id name text text1 text2 config subconfig1 subconfig2')
+
+if njit is not None:
+    @njit(cache=True)
+    def _resolver_ids_livres(ids_em_uso: np.ndarray, alvos: np.ndarray) -> np.ndarray:
+        """
+        Atribui a cada posição alvo a primeira posição livre a partir dela no mapa
+        de bits, marcando-a como usada. Compilado pelo Numba.
+        """
+        resolvidos = np.empty_like(alvos)
+        for i in range(len(alvos)):
+            posicao = alvos[i]
+            while ids_em_uso[posicao]:
+                posicao += 1
+            ids_em_uso[posicao] = True
+            resolvidos[i] = posicao
+        return resolvidos
+else:
+    def _resolver_ids_livres(ids_em_uso: np.ndarray, alvos: np.ndarray) -> np.ndarray:
+        """
+        Atribui a cada posição alvo a primeira posição livre a partir dela no mapa
+        de bits, marcando-a como usada. Versão sem Numba.
+        """
+        resolvidos = np.empty_like(alvos)
+        for i, posicao in enumerate(alvos.tolist()):
+            if ids_em_uso[posicao]:
+                # argmin encontra o primeiro False (ID livre) a partir da posição alvo
+                posicao += int(np.argmin(ids_em_uso[posicao:]))
+            ids_em_uso[posicao] = True
+            resolvidos[i] = posicao
+        return resolvidos
+
+
+# O mapa de bits só é usado enquanto a faixa de IDs couber em poucos bytes por ID;
+# acima disso, os conflitos são resolvidos por _resolver_ids_livres_esparsos
+_AMPLITUDE_MAXIMA_POR_ID = 64
+_AMPLITUDE_MINIMA_DO_MAPA = 1 << 20
+
+
+def _resolver_ids_livres_esparsos(ids_existentes: np.ndarray, ids_novos: np.ndarray) -> np.ndarray:
+    """
+    Mesma resolução de _resolver_ids_livres, mas com um conjunto, para IDs
+    esparsos demais para caber em um mapa de bits.
+    """
+    ids_em_uso = set(ids_existentes.tolist())
+    resolvidos = []
+    for id_novo in ids_novos.tolist():
+        while id_novo in ids_em_uso:
+            id_novo += 1
+        ids_em_uso.add(id_novo)
+        resolvidos.append(id_novo)
+    return np.array(resolvidos, dtype=np.int64)
+
 
 class AtualizadorDeAlarmes:
     """
@@ -9,119 +96,415 @@ class AtualizadorDeAlarmes:
     em um arquivo YAML, com transformações de dados e respeito à prioridade.
     """
 
-    def __init__(self, yaml_path: str, excel_path: str):
+    def __init__(self, yaml_path: str, excel_path: str, modo_anexar: bool = False, formato_json: bool = False):
+        if modo_anexar and formato_json:
+            raise ValueError("Os modos 'anexar' e 'json' não podem ser usados juntos.")
         self.yaml_path = yaml_path
         self.excel_path = excel_path
-        print(f"Inicializando atualização do arquivo '{yaml_path}' com dados de '{excel_path}'.")
+        # Se True, apenas os alarmes novos são acrescentados ao fim do YAML existente
+        self.modo_anexar = modo_anexar
+        # Se True, o arquivo é gravado como JSON (um subconjunto válido de YAML 1.2)
+        self.formato_json = formato_json
+        logger.info(f"Inicializando atualização do arquivo '{yaml_path}' com dados de '{excel_path}'.")
+
+    _VALORES_BOOLEANOS = {'sim': True, 'não': False}
 
     # --- NOVO MÉTODO AUXILIAR ---
-    @staticmethod
-    def _transformar_valor_booleano(valor: Any) -> Any:
-        """
-        Transforma 'sim'/'não' (case-insensitive) em True/False.
-        Retorna o valor original se não for uma correspondência.
-        """
-        # Converte o valor para string, remove espaços e coloca em minúsculas
-        valor_str = str(valor).strip().lower()
-        
-        if valor_str == 'sim':
-            return True
-        elif valor_str == 'não':
-            return False
-        
-        # Se não for 'sim' nem 'não', retorna o valor original
-        return valor
+    @classmethod
+    def _transformar_coluna_booleana(cls, coluna: Sequence[Any]) -> List[Any]:
+        """
+        Transforma 'sim'/'não' (case-insensitive) em True/False, aplicando o
+        mapeamento a cada valor da coluna. Mantém o valor original onde não
+        houver correspondência.
+        """
+        mapa = cls._VALORES_BOOLEANOS
+        return [mapa.get(str(valor).strip().lower(), valor) for valor in coluna]
 
     def _carregar_alarmes_yaml(self) -> List[Dict[str, Any]]:
-        if not os.path.exists(self.yaml_path):
-            print(f"Arquivo YAML '{self.yaml_path}' não encontrado. Será criado um novo.")
+        # Abre direto e trata a ausência do arquivo, sem uma checagem de existência antes
+        try:
+            f = open(self.yaml_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            logger.info(f"Arquivo YAML '{self.yaml_path}' não encontrado. Será criado um novo.")
             return []
-        
-        with open(self.yaml_path, 'r', encoding='utf-8') as f:
+        with f:
             try:
-                alarms = yaml.safe_load(f)
+                alarms = yaml.load(f, Loader=SafeLoader)
                 if isinstance(alarms, list):
-                    print(f"Encontrados {len(alarms)} alarmes existentes no arquivo YAML.")
+                    logger.info(f"Encontrados {len(alarms)} alarmes existentes no arquivo YAML.")
                     return alarms
                 else:
-                    print("Arquivo YAML não contém uma lista válida. Iniciando com uma lista vazia.")
+                    logger.warning("Arquivo YAML não contém uma lista válida. Iniciando com uma lista vazia.")
                     return []
             except yaml.YAMLError as e:
-                print(f"Erro ao ler o arquivo YAML: {e}. Iniciando com uma lista vazia.")
+                logger.error(f"Erro ao ler o arquivo YAML: {e}. Iniciando com uma lista vazia.")
                 return []
 
-    def _carregar_alarmes_excel(self) -> List[Dict[str, Any]]:
+    # alarm_id que pode ser convertido com int() com o mesmo resultado do SafeLoader
+    _INTEIRO_DECIMAL = re.compile(r'[-+]?(0|[1-9][0-9]*)')
+
+    def _carregar_ids_yaml(self) -> Optional[np.ndarray]:
         """
-        Lê o arquivo Excel e o transforma em uma lista de dicionários de alarme.
+        Carrega apenas os IDs dos alarmes existentes no arquivo YAML, percorrendo
+        os eventos do parser em vez de construir a árvore completa de objetos.
+        Retorna None, para que o arquivo seja carregado e regravado por completo,
+        se ele não existir, não tiver nenhum item, não for uma lista em bloco na
+        coluna 0 (único formato em que alarmes novos podem ser acrescentados ao
+        final) ou se algum alarm_id não for um inteiro decimal simples.
         """
         try:
-            df = pd.read_excel(self.excel_path, header=None)
-            novos_alarmes = []
-            for index, row in df.iterrows():
-                # Aplica a transformação ao valor da coluna D (índice 3)
-                valor_text1_processado = self._transformar_valor_booleano(row[3])
-                
-                alarm_data = {
-                    'alarm_id': int(row[0]), 
-                    'name': str(row[1]),
-                    'text': {
-                        'text': str(row[2]),
-                        'text1': valor_text1_processado,
-                        'text2': str(row[4])
-                    },
-                    'config': {
-                        'config': str(row[5]), 
-                        'subconfig1': str(row[6]), 
-                        'subconfig2': str(row[7])
-                    }
-                }
-                novos_alarmes.append(alarm_data)
-            print(f"Encontrados {len(novos_alarmes)} alarmes no arquivo Excel para processar.")
+            f = open(self.yaml_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return None
+
+        inicio_colecao = (yaml.SequenceStartEvent, yaml.MappingStartEvent)
+        fim_colecao = (yaml.SequenceEndEvent, yaml.MappingEndEvent)
+        inicio_no = (yaml.ScalarEvent, yaml.AliasEvent) + inicio_colecao
+
+        ids = []
+        itens = 0
+        profundidade = 0
+        filho = 0  # posição do nó atual dentro do alarme (chaves nas posições pares)
+        capturar = False
+        documentos = 0
+        pode_anexar = True
+        ids_legiveis = True
+        with f:
+            try:
+                for evento in yaml.parse(f, Loader=SafeLoader):
+                    if profundidade == 0 and isinstance(evento, inicio_no):
+                        if not isinstance(evento, yaml.SequenceStartEvent):
+                            return None
+                        # Listas em fluxo ('[...]', como as do --json) ou indentadas não
+                        # podem ser continuadas com itens '- alarm_id:' na coluna 0
+                        if evento.flow_style or evento.start_mark.column != 0:
+                            pode_anexar = False
+                    elif isinstance(evento, yaml.DocumentStartEvent):
+                        documentos += 1
+                        if documentos > 1:
+                            pode_anexar = False
+                    elif isinstance(evento, yaml.DocumentEndEvent) and evento.explicit:
+                        # Um '...' no final encerraria o documento antes dos itens novos
+                        pode_anexar = False
+                    if profundidade == 1 and isinstance(evento, inicio_no):
+                        itens += 1
+                    # Profundidade 2 = nós de primeiro nível dentro de cada alarme
+                    if profundidade == 2 and isinstance(evento, inicio_no):
+                        if capturar:
+                            capturar = False
+                            # Só inteiros decimais simples são lidos aqui; aliases, strings e
+                            # outras formas (0x1F, 017...) ficam com o carregamento completo.
+                            # Escalares simples têm style None no parser em Python e '' no em C
+                            if isinstance(evento, yaml.ScalarEvent) and not evento.style \
+                                    and self._INTEIRO_DECIMAL.fullmatch(evento.value):
+                                ids.append(int(evento.value))
+                            else:
+                                ids_legiveis = False
+                        elif filho % 2 == 0 and isinstance(evento, yaml.ScalarEvent) and evento.value == 'alarm_id':
+                            capturar = True
+                        filho += 1
+                    if isinstance(evento, inicio_colecao):
+                        profundidade += 1
+                        if profundidade == 2:
+                            filho = 0
+                    elif isinstance(evento, fim_colecao):
+                        profundidade -= 1
+            except yaml.YAMLError:
+                # O carregamento completo registra o erro e decide o que fazer
+                return None
+
+        if not itens:
+            return None
+        if not pode_anexar:
+            logger.info("O formato do arquivo YAML não permite acrescentar alarmes ao final. Ele será regravado por completo.")
+            return None
+        if not ids_legiveis:
+            logger.info("Nem todos os IDs do arquivo YAML são inteiros simples. Ele será carregado e regravado por completo.")
+            return None
+        logger.info(f"Encontrados {len(ids)} alarmes existentes no arquivo YAML.")
+        return np.array(ids, dtype=np.int64)
+
+    @staticmethod
+    def _normalizar_celula_calamine(valor: Any) -> Any:
+        """Deixa os valores do calamine iguais aos que o openpyxl devolveria."""
+        # Números vêm sempre como float; inteiros voltam a ser int
+        if isinstance(valor, float) and valor.is_integer():
+            return int(valor)
+        # Datas sem hora vêm como date; o openpyxl devolve datetime à meia-noite
+        if isinstance(valor, datetime.date) and not isinstance(valor, datetime.datetime):
+            return datetime.datetime.combine(valor, datetime.time())
+        return valor
+
+    def _ler_linhas_excel(self) -> Iterator[tuple]:
+        """
+        Percorre as linhas da primeira planilha do Excel como tuplas de valores,
+        sem montar um DataFrame. Células vazias viram '' e linhas vazias são ignoradas.
+        """
+        if CalamineWorkbook is not None:
+            # O arquivo é aberto aqui para que a ausência dele gere FileNotFoundError,
+            # como no openpyxl, em vez do erro genérico do calamine
+            with open(self.excel_path, 'rb') as f:
+                wb = CalamineWorkbook.from_filelike(f)
+            try:
+                linhas = wb.get_sheet_by_index(0).to_python(skip_empty_area=False)
+            finally:
+                wb.close()
+            normalizar = self._normalizar_celula_calamine
+            for linha in linhas:
+                if any(valor != '' for valor in linha):
+                    yield tuple(map(normalizar, linha))
+            return
+
+        wb = openpyxl.load_workbook(self.excel_path, read_only=True, data_only=True)
+        try:
+            for linha in wb.worksheets[0].iter_rows(values_only=True):
+                if any(valor is not None for valor in linha):
+                    yield tuple('' if valor is None else valor for valor in linha)
+        finally:
+            wb.close()
+
+    def _carregar_alarmes_excel(self) -> Optional[ColunasDeAlarmes]:
+        """
+        Lê o arquivo Excel e o transforma em colunas de alarme (uma lista por campo).
+        """
+        try:
+            # Transpõe as linhas (colunas A..H) em uma tupla de valores por coluna
+            linhas = [linha[:8] for linha in self._ler_linhas_excel()]
+            colunas = list(zip(*linhas)) or [()] * 8
+            # Aplica a transformação sim/não a cada valor da coluna D (índice 3)
+            colunas[3] = self._transformar_coluna_booleana(colunas[3])
+            # Converte o tipo de cada valor, percorrendo uma coluna de cada vez
+            colunas[0] = list(map(int, colunas[0]))
+            for i in (1, 2, 4, 5, 6, 7):
+                colunas[i] = list(map(str, colunas[i]))
+            novos_alarmes = ColunasDeAlarmes._make(colunas)
+            logger.info(f"Encontrados {len(novos_alarmes.alarm_id)} alarmes no arquivo Excel para processar.")
             return novos_alarmes
         except FileNotFoundError:
-            print(f"Erro: Arquivo Excel '{self.excel_path}' não encontrado.")
-            return []
+            logger.error(f"Erro: Arquivo Excel '{self.excel_path}' não encontrado.")
+            return None
         except Exception as e:
-            print(f"Erro ao processar o arquivo Excel: {e}")
-            return []
+            logger.error(f"Erro ao processar o arquivo Excel: {e}")
+            return None
+
+    @staticmethod
+    def _montar_alarmes(colunas: ColunasDeAlarmes) -> List[Dict[str, Any]]:
+        """Monta os dicionários aninhados de alarme a partir das colunas, logo antes da gravação."""
+        return [
+            {
+                'alarm_id': alarm_id,
+                'name': name,
+                'text': {'text': text, 'text1': text1, 'text2': text2},
+                'config': {'config': config, 'subconfig1': subconfig1, 'subconfig2': subconfig2}
+            }
+            for alarm_id, name, text, text1, text2, config, subconfig1, subconfig2 in zip(*colunas)
+        ]
+
+    # Ordem fixa das chaves de um alarme, usada pelo emissor especializado
+    _ESQUEMA_ALARME = ('alarm_id', 'name', 'text', 'config')
+    _ESQUEMA_TEXT = ('text', 'text1', 'text2')
+    _ESQUEMA_CONFIG = ('config', 'subconfig1', 'subconfig2')
+    # Tipos que o emissor especializado sabe escrever; datas e afins ficam com o yaml.dump
+    _TIPOS_ESCALARES = (str, int, float, type(None))
+
+    # Caracteres que precisam de escape dentro de aspas duplas: '"', '\\', quebras de
+    # linha e tudo que o leitor do PyYAML não aceita como imprimível
+    _CARACTERES_A_ESCAPAR = re.compile('["\\\\\x00-\x1f\x7f-\x9f\u2028\u2029\ud800-\udfff\ufeff\ufffe\uffff]')
+    _ESCAPES_YAML = {
+        '\0': '\\0', '\x07': '\\a', '\b': '\\b', '\t': '\\t', '\n': '\\n', '\x0b': '\\v',
+        '\x0c': '\\f', '\r': '\\r', '\x1b': '\\e', '"': '\\"', '\\': '\\\\',
+        '\x85': '\\N', '\u2028': '\\L', '\u2029': '\\P',
+    }
+
+    @classmethod
+    def _escapar_caractere(cls, correspondencia: re.Match) -> str:
+        caractere = correspondencia.group()
+        escape = cls._ESCAPES_YAML.get(caractere)
+        if escape is not None:
+            return escape
+        codigo = ord(caractere)
+        return f'\\x{codigo:02X}' if codigo <= 0xFF else f'\\u{codigo:04X}'
+
+    @classmethod
+    def _escapar_escalar(cls, valor: Any) -> str:
+        """
+        Converte um valor escalar para sua representação YAML.
+        Strings são sempre escritas entre aspas duplas, com escape de '"', '\\',
+        quebras de linha e caracteres não imprimíveis.
+        """
+        if valor is None:
+            return 'null'
+        if isinstance(valor, bool):
+            return 'true' if valor else 'false'
+        if isinstance(valor, int):
+            return str(valor)
+        if isinstance(valor, float):
+            if math.isnan(valor):
+                return '.nan'
+            if math.isinf(valor):
+                return '.inf' if valor > 0 else '-.inf'
+            # Mesma regra do SafeDumper: '1e+20' vira '1.0e+20', senão o YAML 1.1 lê como string
+            texto = repr(valor).lower()
+            if '.' not in texto and 'e' in texto:
+                texto = texto.replace('e', '.0e', 1)
+            return texto
+        return '"' + cls._CARACTERES_A_ESCAPAR.sub(cls._escapar_caractere, str(valor)) + '"'
+
+    @classmethod
+    def _emitir_alarme(cls, alarme: Dict[str, Any], saida: io.StringIO):
+        """
+        Escreve um alarme no buffer de saída com a mesma estrutura de blocos do
+        yaml.dump, mas com todas as strings entre aspas duplas. Alarmes fora do
+        esquema conhecido, ou com valores de outros tipos, são delegados ao yaml.dump.
+        """
+        text = alarme.get('text')
+        config = alarme.get('config')
+        if (tuple(alarme) != cls._ESQUEMA_ALARME
+                or not isinstance(text, dict) or tuple(text) != cls._ESQUEMA_TEXT
+                or not isinstance(config, dict) or tuple(config) != cls._ESQUEMA_CONFIG
+                or not all(isinstance(valor, cls._TIPOS_ESCALARES)
+                           for valor in (alarme['alarm_id'], alarme['name'], *text.values(), *config.values()))):
+            yaml.dump([alarme], saida, Dumper=SafeDumper, allow_unicode=True, sort_keys=False, indent=2, default_flow_style=False)
+            return
+
+        esc = cls._escapar_escalar
+        saida.write(
+            f"- alarm_id: {esc(alarme['alarm_id'])}\n"
+            f"  name: {esc(alarme['name'])}\n"
+            f"  text:\n"
+            f"    text: {esc(text['text'])}\n"
+            f"    text1: {esc(text['text1'])}\n"
+            f"    text2: {esc(text['text2'])}\n"
+            f"  config:\n"
+            f"    config: {esc(config['config'])}\n"
+            f"    subconfig1: {esc(config['subconfig1'])}\n"
+            f"    subconfig2: {esc(config['subconfig2'])}\n"
+        )
+
+    @staticmethod
+    def _valor_json(valor: Any) -> str:
+        """Converte valores sem equivalente em JSON (datas lidas do YAML, por exemplo) em texto."""
+        if isinstance(valor, (datetime.date, datetime.time)):
+            return valor.isoformat()
+        return str(valor)
+
+    @classmethod
+    def _serializar_json(cls, data: List[Dict[str, Any]]) -> bytes:
+        """Serializa os alarmes como JSON indentado, usando o orjson quando disponível."""
+        if orjson is not None:
+            opcoes = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            return orjson.dumps(data, default=cls._valor_json, option=opcoes) + b'\n'
+        return (json.dumps(data, ensure_ascii=False, indent=2, default=cls._valor_json) + '\n').encode('utf-8')
+
+    @staticmethod
+    def _chave_de_ordenacao(alarme: Dict[str, Any]) -> Tuple[int, Any]:
+        """Ordena os IDs inteiros pelo valor e coloca os demais (strings, ausentes...) depois, pelo texto."""
+        alarm_id = alarme.get('alarm_id')
+        if isinstance(alarm_id, int):
+            return (0, alarm_id)
+        return (1, str(alarm_id))
 
     def _salvar_yaml(self, data: List[Dict[str, Any]]):
         """Salva a lista de dados, mantendo a ordem original."""
-        data_sorted = sorted(data, key=lambda k: k['alarm_id'])
-        with open(self.yaml_path, 'w', encoding='utf-8') as f:
-            yaml.dump(data_sorted, f, allow_unicode=True, sort_keys=False, indent=2, default_flow_style=False)
-        print(f"Arquivo '{self.yaml_path}' salvo com sucesso com um total de {len(data_sorted)} alarmes. A ORDEM ORIGINAL FOI MANTIDA.")
+        # Ordena no próprio lugar, a lista recebida já é uma cópia montada pelo chamador
+        data.sort(key=self._chave_de_ordenacao)
+        if self.formato_json:
+            with open(self.yaml_path, 'wb') as f:
+                f.write(self._serializar_json(data))
+        else:
+            # Serializa tudo em memória e grava no arquivo de uma só vez
+            saida = io.StringIO()
+            for alarme in data:
+                self._emitir_alarme(alarme, saida)
+            with open(self.yaml_path, 'w', encoding='utf-8') as f:
+                f.write(saida.getvalue() or '[]\n')
+        logger.info(f"Arquivo '{self.yaml_path}' salvo com sucesso com um total de {len(data)} alarmes. A ORDEM ORIGINAL FOI MANTIDA.")
 
 
+    def _anexar_yaml(self, data: List[Dict[str, Any]]):
+        """Acrescenta apenas os alarmes novos ao fim do arquivo YAML, sem reescrevê-lo."""
+        data.sort(key=itemgetter('alarm_id'))
+        saida = io.StringIO()
+        for alarme in data:
+            self._emitir_alarme(alarme, saida)
+        # Listas YAML de nível superior podem ser concatenadas, desde que o
+        # arquivo existente termine com uma quebra de linha
+        with open(self.yaml_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            precisa_quebra = f.read(1) != b'\n'
+        with open(self.yaml_path, 'a', encoding='utf-8') as f:
+            if precisa_quebra:
+                f.write('\n')
+            f.write(saida.getvalue())
+        logger.info(f"Arquivo '{self.yaml_path}' atualizado com sucesso: {len(data)} alarmes acrescentados ao final.")
+
     def executar_atualizacao(self):
-        alarmes_existentes = self._carregar_alarmes_yaml()
+        ids_existentes = self._carregar_ids_yaml() if self.modo_anexar else None
+        if ids_existentes is not None:
+            # Os alarmes já gravados não são reescritos, então bastam os seus IDs
+            alarmes_existentes = None
+        else:
+            alarmes_existentes = self._carregar_alarmes_yaml()
+            # IDs ausentes ou que não são inteiros nunca colidem com os do Excel e ficam de fora
+            ids_existentes = np.array([alarm['alarm_id'] for alarm in alarmes_existentes
+                                       if isinstance(alarm.get('alarm_id'), int)], dtype=np.int64)
         novos_alarmes = self._carregar_alarmes_excel()
 
-        if not novos_alarmes:
-            print("Nenhum alarme novo para adicionar. Nenhuma alteração foi feita.")
+        if novos_alarmes is None or not novos_alarmes.alarm_id:
+            logger.info("Nenhum alarme novo para adicionar. Nenhuma alteração foi feita.")
             return
             
-        ids_em_uso = {alarm['alarm_id'] for alarm in alarmes_existentes}
-        alarmes_processados = []
-
-        for alarme_novo in novos_alarmes:
-            id_alvo = alarme_novo['alarm_id']
-            if id_alvo in ids_em_uso:
-                id_novo_provisorio = id_alvo
-                while id_novo_provisorio in ids_em_uso:
-                    id_novo_provisorio += 1
-                print(f"  - CONFLITO: ID de prioridade {id_alvo} já está em uso. Atribuindo o próximo ID livre mais próximo: {id_novo_provisorio}.")
-                alarme_novo['alarm_id'] = id_novo_provisorio
-            ids_em_uso.add(alarme_novo['alarm_id'])
-            alarmes_processados.append(alarme_novo)
-
-        lista_final = alarmes_existentes + alarmes_processados
-        self._salvar_yaml(lista_final)
+        ids_novos = np.array(novos_alarmes.alarm_id, dtype=np.int64)
+
+        # Verificação vetorizada: só há conflitos para resolver se algum ID novo
+        # colide com os existentes ou se repete entre os próprios alarmes novos
+        if np.isin(ids_novos, ids_existentes).any() or len(np.unique(ids_novos)) != len(ids_novos):
+            # Mapa de bits dos IDs em uso, deslocado pelo menor ID conhecido. A margem de
+            # len(novos_alarmes) garante que sempre exista um ID livre após o maior ID.
+            # Se os IDs forem esparsos demais, o mapa não é criado e usa-se um conjunto.
+            todos_os_ids = np.concatenate([ids_existentes, ids_novos])
+            id_base = int(todos_os_ids.min())
+            amplitude = int(todos_os_ids.max()) - id_base + len(ids_novos) + 1
+            # Apenas a coluna de IDs é percorrida; os demais campos não são tocados
+            if amplitude <= max(_AMPLITUDE_MAXIMA_POR_ID * len(todos_os_ids), _AMPLITUDE_MINIMA_DO_MAPA):
+                ids_em_uso = np.zeros(amplitude, dtype=bool)
+                ids_em_uso[ids_existentes - id_base] = True
+                ids_resolvidos = _resolver_ids_livres(ids_em_uso, ids_novos - id_base) + id_base
+            else:
+                ids_resolvidos = _resolver_ids_livres_esparsos(ids_existentes, ids_novos)
+            em_conflito = np.flatnonzero(ids_resolvidos != ids_novos)
+            conflitos = list(zip(ids_novos[em_conflito].tolist(), ids_resolvidos[em_conflito].tolist()))
+            novos_alarmes = novos_alarmes._replace(alarm_id=ids_resolvidos.tolist())
+
+            # Um único registro com todos os conflitos, em vez de uma escrita por conflito
+            if conflitos:
+                logger.info("%d conflitos de ID resolvidos:\n%s", len(conflitos), "\n".join(
+                    f"  - CONFLITO: ID de prioridade {id_alvo} já está em uso. Atribuindo o próximo ID livre mais próximo: {id_novo}."
+                    for id_alvo, id_novo in conflitos))
+
+        alarmes_processados = self._montar_alarmes(novos_alarmes)
+        if alarmes_existentes is None:
+            self._anexar_yaml(alarmes_processados)
+        else:
+            self._salvar_yaml((alarmes_existentes or []) + alarmes_processados)
 
 # --- Bloco de Execução Principal ---
 if __name__ == "__main__":
     ARQUIVO_YAML = 'test.yaml'
     ARQUIVO_EXCEL = 'test_yaml.xlsx'
+
+    parser = argparse.ArgumentParser(description="Atualiza o arquivo YAML de alarmes com os dados do Excel.")
+    modo_de_saida = parser.add_mutually_exclusive_group()
+    modo_de_saida.add_argument('--append', action='store_true',
+                               help="Acrescenta apenas os alarmes novos ao fim do YAML, sem reescrever o arquivo. "
+                                    "Nesse modo o arquivo deixa de ficar ordenado por alarm_id.")
+    modo_de_saida.add_argument('--json', action='store_true',
+                               help="Grava o arquivo como JSON (YAML 1.2 válido), bem mais rápido que o YAML formatado.")
+    parser.add_argument('--quiet', action='store_true',
+                        help="Exibe apenas avisos e erros.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format='%(message)s')
     
-    atualizador = AtualizadorDeAlarmes(yaml_path=ARQUIVO_YAML, excel_path=ARQUIVO_EXCEL)
+    atualizador = AtualizadorDeAlarmes(yaml_path=ARQUIVO_YAML, excel_path=ARQUIVO_EXCEL, modo_anexar=args.append, formato_json=args.json)
     atualizador.executar_atualizacao()
\ No newline at end of file